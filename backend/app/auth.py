@@ -4,54 +4,228 @@ Extracts and validates the NextAuth JWT from the Authorization header or
 the session cookie, then returns the authenticated user_id.
 """
 
+import base64
+import binascii
+import hashlib
+import hmac
 import logging
+import threading
+import time
+from typing import Any, NamedTuple
 
+import orjson
 from fastapi import HTTPException, Request, WebSocket
-from jose import JWTError, jwt
+from starlette.types import Scope
 
-from app.config import settings
+from app.config import NEXTAUTH_SECRET_BYTES
 
 logger = logging.getLogger(__name__)
 
 _ALGORITHM = "HS256"
+_BEARER_PREFIXES = ("Bearer ", "bearer ", "BEARER ")
+# NextAuth session tokens are well under this; anything larger is rejected
+# before it reaches base64/HMAC work.
+_MAX_TOKEN_LENGTH = 8192
+_SESSION_COOKIE = b"next-auth.session-token="
+_SECURE_SESSION_COOKIE = b"__Secure-next-auth.session-token="
+
+# Validated tokens are cached so repeat requests with the same bearer token
+# skip the signature check. Entries never outlive the token's own `exp`.
+_TOKEN_CACHE_MAX_ENTRIES = 10_000
+_TOKEN_CACHE_MAX_TTL_SECONDS = 300
+
+
+class _CachedToken(NamedTuple):
+    user_id: str
+    expires_at: float
+
+
+_token_cache: dict[str, _CachedToken] = {}
+_token_cache_lock = threading.Lock()
 
 
 def _get_token_from_auth_header(auth_header: str | None) -> str | None:
-    if auth_header and auth_header.lower().startswith("bearer "):
+    if not auth_header:
+        return None
+    # Common spellings are matched without copying the header; other casings
+    # only lowercase the 7-character prefix.
+    if auth_header.startswith(_BEARER_PREFIXES) or auth_header[:7].lower() == "bearer ":
         return auth_header[7:]
     return None
 
 
+class _InvalidTokenError(Exception):
+    """Raised when a token fails structural, signature or claim validation."""
+
+
+def _b64url_decode(segment: str) -> bytes:
+    try:
+        return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+    except (binascii.Error, ValueError) as exc:
+        raise _InvalidTokenError("Malformed token segment") from exc
+
+
+def _load_json_segment(segment: str) -> dict[str, Any]:
+    try:
+        value = orjson.loads(_b64url_decode(segment))
+    except ValueError as exc:
+        raise _InvalidTokenError("Token segment is not valid JSON") from exc
+    if not isinstance(value, dict):
+        raise _InvalidTokenError("Token segment must be a JSON object")
+    return value
+
+
+def _verify_hs256(token: str, secret: bytes) -> dict[str, Any]:
+    """Verify an HS256 JWS and return its claims.
+
+    Only the pieces NextAuth tokens need are implemented: the `alg` header,
+    a constant-time HMAC-SHA256 signature check, and the `exp`/`nbf`/`iat`
+    and `aud` claims, checked the way python-jose checked them.
+    """
+    parts = token.split(".")
+    if len(parts) != 3:
+        raise _InvalidTokenError("Token must have three segments")
+    header_b64, payload_b64, signature_b64 = parts
+
+    header = _load_json_segment(header_b64)
+    if header.get("alg") != _ALGORITHM:
+        raise _InvalidTokenError("Unsupported token algorithm")
+
+    try:
+        signing_input = f"{header_b64}.{payload_b64}".encode("ascii")
+    except UnicodeEncodeError as exc:
+        raise _InvalidTokenError("Malformed token") from exc
+    expected = hmac.new(secret, signing_input, hashlib.sha256).digest()
+    if not hmac.compare_digest(expected, _b64url_decode(signature_b64)):
+        raise _InvalidTokenError("Signature verification failed")
+
+    payload = _load_json_segment(payload_b64)
+    now = time.time()
+    # No audience is configured, so, as with python-jose, a token scoped to
+    # any audience is not for us.
+    if "aud" in payload:
+        raise _InvalidTokenError("Invalid audience")
+    for claim in ("exp", "nbf", "iat"):
+        value = payload.get(claim)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            raise _InvalidTokenError(f"Invalid {claim} claim")
+    exp = payload.get("exp")
+    if exp is not None and exp < now:
+        raise _InvalidTokenError("Token has expired")
+    nbf = payload.get("nbf")
+    if nbf is not None and nbf > now:
+        raise _InvalidTokenError("Token is not yet valid")
+    return payload
+
+
+def _get_cached_user_id(token: str) -> str | None:
+    with _token_cache_lock:
+        hit = _token_cache.get(token)
+        if hit is None:
+            return None
+        if hit.expires_at > time.time():
+            return hit.user_id
+        _token_cache.pop(token, None)
+    return None
+
+
+def _cache_user_id(token: str, user_id: str, exp: object) -> None:
+    now = time.time()
+    expires_at = now + _TOKEN_CACHE_MAX_TTL_SECONDS
+    if isinstance(exp, (int, float)):
+        expires_at = min(expires_at, float(exp))
+    if expires_at <= now:
+        return
+
+    with _token_cache_lock:
+        if token not in _token_cache and len(_token_cache) >= _TOKEN_CACHE_MAX_ENTRIES:
+            # Dicts keep insertion order, so this drops the oldest entry in
+            # O(1). Expired entries are dropped lazily by lookups.
+            del _token_cache[next(iter(_token_cache))]
+        _token_cache[token] = _CachedToken(user_id, expires_at)
+
+
 def _decode_user_id(token: str) -> str:
     """Decode HS256 auth token and return the NextAuth user id (`sub`)."""
 
-    secret = settings.nextauth_secret
+    secret = NEXTAUTH_SECRET_BYTES
     if not secret:
         logger.error("NEXTAUTH_SECRET is not configured on the backend")
         raise HTTPException(status_code=500, detail="Auth configuration error")
 
-    try:
-        payload = jwt.decode(token, secret, algorithms=[_ALGORITHM])
-        user_id = payload.get("sub")
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        return user_id
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    if len(token) > _MAX_TOKEN_LENGTH or token.count(".") != 2:
+        raise HTTPException(status_code=401, detail="Invalid token")
 
+    cached = _get_cached_user_id(token)
+    if cached is not None:
+        return cached
 
-def _get_token_from_cookies(cookies: dict[str, str]) -> str | None:
-    token = cookies.get("next-auth.session-token")
+    try:
+        payload = _verify_hs256(token, secret)
+    except _InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Invalid or expired token") from None
+
+    user_id = payload.get("sub")
+    # python-jose rejected non-string subjects; an int or dict must never
+    # become a user id in ownership checks.
+    if not isinstance(user_id, str) or not user_id:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    _cache_user_id(token, user_id, payload.get("exp"))
+    return user_id
+
+
+def _find_cookie_value(cookie_header: bytes, needle: bytes) -> str | None:
+    start = 0
+    while True:
+        index = cookie_header.find(needle, start)
+        if index < 0:
+            return None
+        # Only accept matches that begin a cookie pair, not a longer name's suffix.
+        if index == 0 or cookie_header[index - 1] in b"; \t":
+            value_start = index + len(needle)
+            value_end = cookie_header.find(b";", value_start)
+            if value_end < 0:
+                value_end = len(cookie_header)
+            value = cookie_header[value_start:value_end].strip()
+            return value.decode("latin-1") if value else None
+        start = index + 1
+
+
+def _get_token_from_cookie_header(cookie_header: bytes | None) -> str | None:
+    """Pull the NextAuth session token out of a raw Cookie header in one scan."""
+    if not cookie_header:
+        return None
+    token = _find_cookie_value(cookie_header, _SESSION_COOKIE)
     if token:
         return token
-    return cookies.get("__Secure-next-auth.session-token")
+    return _find_cookie_value(cookie_header, _SECURE_SESSION_COOKIE)
 
 
-def get_current_user_id(request: Request) -> str:
-    """FastAPI dependency that extracts user_id from bearer token or cookies."""
-    token = _get_token_from_auth_header(request.headers.get("authorization"))
+def _get_raw_header(scope: Scope, name: bytes) -> bytes | None:
+    """Return the first raw header value without building a Headers object."""
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+def _get_token_from_scope(scope: Scope) -> str | None:
+    auth_header = _get_raw_header(scope, b"authorization")
+    token = _get_token_from_auth_header(
+        auth_header.decode("latin-1") if auth_header is not None else None
+    )
     if not token:
-        token = _get_token_from_cookies(request.cookies)
+        token = _get_token_from_cookie_header(_get_raw_header(scope, b"cookie"))
+    return token
+
+
+async def get_current_user_id(request: Request) -> str:
+    """FastAPI dependency that extracts user_id from bearer token or cookies.
+
+    Declared async so FastAPI calls it on the event loop instead of
+    dispatching to the threadpool; nothing in here blocks.
+    """
+    token = _get_token_from_scope(request.scope)
 
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
@@ -61,9 +235,7 @@ def get_current_user_id(request: Request) -> str:
 
 def get_current_user_id_from_websocket(websocket: WebSocket) -> str:
     """Authenticate websocket clients via bearer token or session cookie."""
-    token = _get_token_from_auth_header(websocket.headers.get("authorization"))
-    if not token:
-        token = _get_token_from_cookies(websocket.cookies)
+    token = _get_token_from_scope(websocket.scope)
 
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
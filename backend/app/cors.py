@@ -0,0 +1,45 @@
+"""CORS middleware used by the API.
+
+Thin subclass of Starlette's CORSMiddleware that keeps the configured origins
+in a frozenset so the per-request origin check is a hash lookup, and memoizes
+preflight responses since they only depend on the request's CORS headers.
+"""
+
+import functools
+from typing import Sequence
+
+from starlette.datastructures import Headers
+from starlette.middleware.cors import CORSMiddleware as _StarletteCORSMiddleware
+from starlette.responses import Response
+from starlette.types import ASGIApp
+
+_PREFLIGHT_CACHE_SIZE = 256
+
+
+class CORSMiddleware(_StarletteCORSMiddleware):
+    def __init__(self, app: ASGIApp, allow_origins: Sequence[str] = (), **kwargs) -> None:
+        super().__init__(app, allow_origins=allow_origins, **kwargs)
+        # Starlette checks `origin in self.allow_origins`; a set makes it O(1).
+        self.allow_origins = frozenset(allow_origins)
+        self._cached_preflight = functools.lru_cache(maxsize=_PREFLIGHT_CACHE_SIZE)(
+            self._build_preflight
+        )
+
+    def _build_preflight(
+        self, origin: str, method: str, requested_headers: str | None
+    ) -> tuple[int, bytes, tuple[tuple[bytes, bytes], ...]]:
+        raw = {"origin": origin, "access-control-request-method": method}
+        if requested_headers is not None:
+            raw["access-control-request-headers"] = requested_headers
+        response = super().preflight_response(request_headers=Headers(headers=raw))
+        return response.status_code, response.body, tuple(response.raw_headers)
+
+    def preflight_response(self, request_headers: Headers) -> Response:
+        status_code, body, raw_headers = self._cached_preflight(
+            request_headers["origin"],
+            request_headers["access-control-request-method"],
+            request_headers.get("access-control-request-headers"),
+        )
+        response = Response(body, status_code=status_code)
+        response.raw_headers = list(raw_headers)
+        return response
@@ -1,17 +1,61 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from sqlalchemy import text
 
-from app.config import settings
-from app.routers import audio, chat, courses, exam_cram, export, lessons, sessions, voice
+from app.config import CORS_ORIGINS, IS_DEV
+from app.cors import CORSMiddleware
+from app.models.course import flush_courses
+from app.models.session import flush_sessions
+from app.routers import audio, chat, courses, exam_cram, export, lessons, mock, sessions, voice
 from app.services.voice_service import get_voice_service
 from app.database import engine
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Doceo API", version="0.1.0")
+
+async def _probe_database() -> None:
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        logger.info("Database connectivity check succeeded")
+    except Exception as exc:
+        logger.warning("Database connectivity check failed: %s", exc)
+
+
+async def _probe_voice() -> None:
+    try:
+        health = await get_voice_service().get_health(force=True)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Voice health status=%s detail=%s",
+                health.get("status"),
+                health.get("detail"),
+            )
+    except Exception as exc:
+        logger.warning("Voice health probe failed: %s", exc)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """Warm critical integrations concurrently; on shutdown flush and dispose."""
+    await asyncio.gather(_probe_database(), _probe_voice())
+    yield
+    flush_courses()
+    flush_sessions()
+    await engine.dispose()
+
+
+app = FastAPI(
+    title="Doceo API",
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 development_origin_regex = (
     r"^https?://("
@@ -21,54 +65,32 @@ development_origin_regex = (
     r"192\.168\.\d+\.\d+"
     r")(:\d+)?$"
 )
-allow_origin_regex = (
-    development_origin_regex if settings.environment.lower() == "development" else None
-)
+allow_origin_regex = development_origin_regex if IS_DEV else None
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.cors_origins_list,
+    allow_origins=CORS_ORIGINS,
     allow_origin_regex=allow_origin_regex,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=86400,
 )
 
-app.include_router(sessions.router, prefix="/sessions", tags=["sessions"])
-app.include_router(lessons.router, prefix="/sessions", tags=["lessons"])
-app.include_router(chat.router, prefix="/sessions", tags=["chat"])
-app.include_router(export.router, prefix="/sessions", tags=["export"])
-app.include_router(exam_cram.router, prefix="/sessions", tags=["exam-cram"])
-app.include_router(audio.router, prefix="/audio", tags=["audio"])
-app.include_router(courses.router, prefix="/courses", tags=["courses"])
-app.include_router(voice.router, prefix="/sessions", tags=["voice"])
-
-
-@app.on_event("startup")
-async def startup() -> None:
-    """Warm critical integrations at startup."""
-    try:
-        async with engine.connect() as conn:
-            await conn.execute(text("SELECT 1"))
-        logger.info("Database connectivity check succeeded")
-    except Exception as exc:
-        logger.warning("Database connectivity check failed: %s", exc)
-
-    try:
-        health = await get_voice_service().get_health(force=True)
-        logger.info(
-            "Voice health status=%s detail=%s",
-            health.get("status"),
-            health.get("detail"),
-        )
-    except Exception as exc:
-        logger.warning("Voice health probe failed: %s", exc)
-
-
-@app.on_event("shutdown")
-async def shutdown() -> None:
-    """Dispose database engine on shutdown."""
-    await engine.dispose()
+_ROUTERS = (
+    (sessions.router, "/sessions", "sessions"),
+    (lessons.router, "/sessions", "lessons"),
+    (chat.router, "/sessions", "chat"),
+    (export.router, "/sessions", "export"),
+    (exam_cram.router, "/sessions", "exam-cram"),
+    (audio.router, "/audio", "audio"),
+    (courses.router, "/courses", "courses"),
+    (voice.router, "/sessions", "voice"),
+)
+if IS_DEV:
+    _ROUTERS += ((mock.router, "/mock", "mock"),)
+for router, prefix, tag in _ROUTERS:
+    app.include_router(router, prefix=prefix, tags=[tag])
 
 
 @app.get("/health")
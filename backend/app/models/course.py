@@ -1,20 +1,45 @@
+import codecs
+import heapq
 import io
-import json
 import re
-import uuid
+import secrets
 import zipfile
 from datetime import datetime
+from operator import itemgetter
 from pathlib import Path
 from typing import Any
 from xml.etree import ElementTree
 
+from app.models.storage import DebouncedWriter, read_json, write_json_atomic
+
 MAX_MATERIAL_SIZE_BYTES = 120 * 1024 * 1024  # 120 MB per upload
 MAX_CHUNKS_PER_MATERIAL = 4000
+_UTF16_BOMS = (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+_TEXT_SUFFIXES = frozenset({".txt", ".md", ".markdown", ".csv", ".json"})
+# Text-run tags in document.xml: body text, equation (OMML) text, and
+# DrawingML text such as shapes, in both the Transitional and the Strict
+# OOXML namespaces.
+_WORDML_NAMESPACES = (
+    "http://schemas.openxmlformats.org/wordprocessingml/2006/main",
+    "http://purl.oclc.org/ooxml/wordprocessingml/main",
+)
+_DOCX_TEXT_NAMESPACES = _WORDML_NAMESPACES + (
+    "http://schemas.openxmlformats.org/officeDocument/2006/math",
+    "http://purl.oclc.org/ooxml/officeDocument/math",
+    "http://schemas.openxmlformats.org/drawingml/2006/main",
+    "http://purl.oclc.org/ooxml/drawingml/main",
+)
+_DOCX_TEXT_TAGS = frozenset(f"{{{namespace}}}t" for namespace in _DOCX_TEXT_NAMESPACES)
+# Paragraphs are detached from the tree once parsed, which bounds memory to the
+# paragraph being read.
+_DOCX_PARAGRAPH_TAGS = frozenset(f"{{{namespace}}}p" for namespace in _WORDML_NAMESPACES)
 
 _courses: dict[str, dict[str, Any]] = {}
 _backend_root = Path(__file__).resolve().parents[2]
 _data_dir = _backend_root / "data"
 _courses_file = _data_dir / "courses.json"
+# Digest of the last bytes written, so saves with no net change skip the disk.
+_courses_digest: bytes | None = None
 
 
 def _utc_now_iso() -> str:
@@ -31,7 +56,7 @@ def _load_courses() -> None:
     global _courses
     _ensure_storage()
     try:
-        payload = json.loads(_courses_file.read_text(encoding="utf-8"))
+        payload = read_json(_courses_file)
     except Exception:
         payload = {}
 
@@ -40,32 +65,104 @@ def _load_courses() -> None:
     else:
         _courses = {}
 
+    # Drop term-frequency maps written by an earlier build; scoring no longer
+    # reads them and they roughly tripled the file.
+    for course in _courses.values():
+        if isinstance(course, dict):
+            for chunk in course.get("chunks") or ():
+                if isinstance(chunk, dict):
+                    chunk.pop("tf", None)
 
-def _save_courses() -> None:
+
+def _write_courses() -> None:
+    global _courses_digest
+    if not _courses_file.exists():
+        _courses_digest = None
     _ensure_storage()
-    _courses_file.write_text(
-        json.dumps(_courses, indent=2, ensure_ascii=False),
-        encoding="utf-8",
-    )
+    _courses_digest = write_json_atomic(_courses_file, _courses, _courses_digest)
+
+
+_courses_writer = DebouncedWriter(_write_courses)
+
+
+def _save_courses() -> None:
+    _courses_writer.schedule()
+
+
+def flush_courses() -> None:
+    """Write any pending course changes to disk now."""
+    _courses_writer.flush()
+
+
+_BLANK_LINE_RUN_RE = re.compile(r"\n{3,}")
 
 
 def _normalize_whitespace(text: str) -> str:
-    lines = [line.strip() for line in text.replace("\r\n", "\n").split("\n")]
-    cleaned = "\n".join(lines)
-    cleaned = re.sub(r"\n{3,}", "\n\n", cleaned)
+    # The replace and the regex each copy or scan the whole text, so skip them
+    # when a cheap substring check shows there is nothing to do.
+    if "\r" in text:
+        text = text.replace("\r\n", "\n")
+    cleaned = "\n".join([line.strip() for line in text.split("\n")])
+    if "\n\n\n" in cleaned:
+        cleaned = _BLANK_LINE_RUN_RE.sub("\n\n", cleaned)
     return cleaned.strip()
 
 
 def _decode_text_bytes(contents: bytes) -> str:
-    for encoding in ("utf-8", "utf-16", "latin-1"):
+    # Only treat the upload as UTF-16 when it says so with a BOM; otherwise a
+    # failed UTF-8 pass goes straight to latin-1, which always decodes.
+    if contents.startswith(_UTF16_BOMS):
         try:
-            return contents.decode(encoding)
-        except Exception:
-            continue
-    return contents.decode("utf-8", errors="ignore")
+            return contents.decode("utf-16")
+        except UnicodeDecodeError:
+            pass
+    try:
+        return contents.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return contents.decode("latin-1")
+
+
+def _extract_pdf_text_pdfium(contents: bytes) -> str | None:
+    """Extract PDF text with PDFium when pypdfium2 is installed.
+
+    PDFium is native and several times faster than pypdf on large documents.
+    Returns None when the library is missing or cannot read the file, so the
+    caller can fall back to pypdf.
+    """
+    try:
+        import pypdfium2 as pdfium
+    except Exception:
+        return None
+
+    try:
+        pdf = pdfium.PdfDocument(contents)
+    except Exception:
+        return None
+
+    pages: list[str] = []
+    try:
+        for index in range(len(pdf)):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            try:
+                extracted = textpage.get_text_range() or ""
+            finally:
+                textpage.close()
+                page.close()
+            if extracted.strip():
+                pages.append(extracted.strip())
+    except Exception:
+        return None
+    finally:
+        pdf.close()
+    return "\n\n".join(pages)
 
 
 def _extract_pdf_text(contents: bytes) -> str:
+    extracted = _extract_pdf_text_pdfium(contents)
+    if extracted is not None:
+        return extracted
+
     try:
         from pypdf import PdfReader
     except Exception as exc:
@@ -89,22 +186,43 @@ def _extract_docx_text(contents: bytes) -> str:
     except Exception as exc:
         raise ValueError("Could not parse DOCX file.") from exc
 
+    # Stream the XML and detach each paragraph from its parent once read, so
+    # the tree never holds more than the open ancestors and one paragraph.
+    text_parts: list[str] = []
+    open_elements: list[ElementTree.Element] = []
     try:
-        root = ElementTree.fromstring(document_xml)
+        for event, node in ElementTree.iterparse(
+            io.BytesIO(document_xml), events=("start", "end")
+        ):
+            if event == "start":
+                open_elements.append(node)
+                continue
+            open_elements.pop()
+            tag = node.tag
+            if tag in _DOCX_TEXT_TAGS:
+                if node.text:
+                    text_parts.append(node.text)
+            elif tag in _DOCX_PARAGRAPH_TAGS and open_elements:
+                open_elements[-1].remove(node)
     except Exception as exc:
         raise ValueError("DOCX XML structure is invalid.") from exc
-
-    text_parts: list[str] = []
-    for node in root.iter():
-        if node.tag.endswith("}t") and node.text:
-            text_parts.append(node.text)
     return "\n".join(text_parts)
 
 
+def _file_suffix(filename: str) -> str:
+    """Lowercased `Path(filename).suffix`, without building a Path."""
+    name = filename.rpartition("/")[2]
+    index = name.rfind(".")
+    # Like Path: no suffix for dotfiles (".pdf") or names ending in a dot.
+    if index <= 0 or index == len(name) - 1:
+        return ""
+    return name[index:].lower()
+
+
 def _extract_text(filename: str, contents: bytes) -> str:
-    suffix = Path(filename).suffix.lower()
+    suffix = _file_suffix(filename)
 
-    if suffix in {".txt", ".md", ".markdown", ".csv", ".json"}:
+    if suffix in _TEXT_SUFFIXES:
         return _decode_text_bytes(contents)
     if suffix == ".pdf":
         return _extract_pdf_text(contents)
@@ -115,11 +233,8 @@ def _extract_text(filename: str, contents: bytes) -> str:
     return _decode_text_bytes(contents)
 
 
-def _chunk_text(text: str, chunk_size: int = 950, overlap: int = 140) -> list[str]:
-    if not text:
-        return []
-
-    normalized = _normalize_whitespace(text)
+def _chunk_text(normalized: str, chunk_size: int = 950, overlap: int = 140) -> list[str]:
+    """Split already-normalized text (see `_normalize_whitespace`) into chunks."""
     if not normalized:
         return []
 
@@ -191,7 +306,9 @@ def create_course(label: str) -> dict[str, Any]:
         if cleaned.lower() == str(existing.get("label", "")).strip().lower():
             return _serialize_course(existing)
 
-    course_id = str(uuid.uuid4())[:8]
+    course_id = secrets.token_hex(4)
+    while course_id in _courses:
+        course_id = secrets.token_hex(4)
     course = {
         "course_id": course_id,
         "label": cleaned,
@@ -242,7 +359,7 @@ def add_material(
     extracted = _extract_text(filename, contents)
     normalized = _normalize_whitespace(extracted)
     if len(normalized) < 40:
-        if Path(filename).suffix.lower() == ".pdf":
+        if _file_suffix(filename) == ".pdf":
             raise ValueError(
                 "Could not extract text from this PDF. If it is scanned/image-based, "
                 "run OCR on the PDF and upload again."
@@ -254,7 +371,7 @@ def add_material(
         raise ValueError("Could not split this document into searchable chunks.")
     chunks = _downsample_chunks(chunks, MAX_CHUNKS_PER_MATERIAL)
 
-    material_id = str(uuid.uuid4())[:10]
+    material_id = secrets.token_hex(5)
     material = {
         "material_id": material_id,
         "filename": filename,
@@ -265,16 +382,15 @@ def add_material(
         "preview": normalized[:260],
     }
 
-    chunk_rows = []
-    for index, chunk in enumerate(chunks):
-        chunk_rows.append(
-            {
-                "chunk_id": f"{material_id}-{index + 1}",
-                "material_id": material_id,
-                "filename": filename,
-                "text": chunk,
-            }
-        )
+    chunk_rows = [
+        {
+            "chunk_id": f"{material_id}-{index}",
+            "material_id": material_id,
+            "filename": filename,
+            "text": chunk,
+        }
+        for index, chunk in enumerate(chunks, start=1)
+    ]
 
     course.setdefault("materials", []).append(material)
     course.setdefault("chunks", []).extend(chunk_rows)
@@ -286,15 +402,15 @@ def _tokenize_query(query: str) -> list[str]:
     return [token for token in re.findall(r"[a-zA-Z0-9_]+", query.lower()) if len(token) > 2]
 
 
-def _score_chunk(text: str, tokens: list[str], query: str) -> int:
-    lowered = text.lower()
+def _score_chunk(lowered: str, tokens: list[str], phrase: str) -> int:
+    """Score lowercased chunk text: capped per-token substring counts plus a phrase bonus."""
     score = 0
     for token in tokens:
         occurrences = lowered.count(token)
         if occurrences:
             score += min(occurrences, 4) * 2
 
-    if query.strip() and query.lower().strip() in lowered:
+    if phrase and phrase in lowered:
         score += 8
 
     return score
@@ -312,12 +428,13 @@ def search_course_snippets(
         return []
 
     tokens = _tokenize_query(query)
+    phrase = query.lower().strip()
     scored: list[tuple[int, dict[str, Any]]] = []
     for chunk in chunks:
         text = str(chunk.get("text", "")).strip()
         if not text:
             continue
-        score = _score_chunk(text, tokens, query)
+        score = _score_chunk(text.lower(), tokens, phrase)
         if tokens and score <= 0:
             continue
         scored.append((score if score > 0 else 1, chunk))
@@ -325,10 +442,11 @@ def search_course_snippets(
     if not scored:
         scored = [(1, chunk) for chunk in chunks[:top_k]]
 
-    scored.sort(key=lambda item: item[0], reverse=True)
+    # nlargest keeps sorted()'s tie order but is O(n log k) for small top_k.
+    top = heapq.nlargest(top_k, scored, key=itemgetter(0))
 
     snippets: list[dict[str, Any]] = []
-    for score, chunk in scored[:top_k]:
+    for score, chunk in top:
         snippets.append(
             {
                 "material_id": chunk.get("material_id"),
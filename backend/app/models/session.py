@@ -1,22 +1,49 @@
-import json
-import uuid
-from datetime import datetime
+import heapq
+import itertools
+import secrets
+import time
+from operator import itemgetter
 from pathlib import Path
 from typing import Any, Optional
 
+from app.models.storage import DebouncedWriter, read_json, write_json_atomic
+
 try:
     from sqlalchemy.ext.asyncio import AsyncSession as _SQLAlchemyAsyncSession
 except Exception:  # pragma: no cover - optional at import time
     _SQLAlchemyAsyncSession = None
 
 _sessions: dict[str, dict[str, Any]] = {}
+# Raw upload images live beside the sessions instead of inside them, so saves
+# can serialize `_sessions` as-is. They are not persisted.
+_image_blobs: dict[str, str] = {}
+# course_id -> session ids, kept as an insertion-ordered dict so course listings
+# only touch that course's sessions.
+_sessions_by_course: dict[str, dict[str, None]] = {}
+# Bumped on every create/update so callers can cache derived data per session;
+# sessions loaded from disk start at 0.
+_session_revisions: dict[str, int] = {}
+_revision_counter = itertools.count(1)
 _backend_root = Path(__file__).resolve().parents[2]
 _data_dir = _backend_root / "data"
 _sessions_file = _data_dir / "sessions.json"
+# Digest of the last bytes written, so saves with no net change skip the disk.
+_sessions_digest: bytes | None = None
+
+
+# Timestamps only carry whole seconds, so the formatted string is reused until
+# the second changes. Stored as one tuple so threads never see a torn pair.
+_iso_second_cache: tuple[int, str] = (-1, "")
 
 
 def _utc_now_iso() -> str:
-    return datetime.utcnow().isoformat(timespec="seconds") + "Z"
+    global _iso_second_cache
+    second = int(time.time())
+    cached_second, cached_iso = _iso_second_cache
+    if second != cached_second:
+        cached_iso = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(second))
+        _iso_second_cache = (second, cached_iso)
+    return cached_iso
 
 
 def _ensure_storage() -> None:
@@ -33,50 +60,108 @@ def _normalize_user_id(user_id: Any) -> str | None:
     return None
 
 
+# Only the two lists are mutable; everything else can be shared by a shallow copy.
+_CONFUSION_STATE_TEMPLATE: dict[str, Any] = {
+    "score": 0.08,
+    "level": "low",
+    "adaptation_mode": "standard",
+    "last_reason": "No strong confusion signals yet.",
+    "signals": None,
+    "misconception_topics": None,
+    "consecutive_confused_turns": 0,
+    "consecutive_clear_turns": 0,
+    "last_updated": None,
+}
+
+
 def _default_confusion_state() -> dict[str, Any]:
-    return {
-        "score": 0.08,
-        "level": "low",
-        "adaptation_mode": "standard",
-        "last_reason": "No strong confusion signals yet.",
-        "signals": [],
-        "misconception_topics": [],
-        "consecutive_confused_turns": 0,
-        "consecutive_clear_turns": 0,
-        "last_updated": _utc_now_iso(),
-    }
+    state = _CONFUSION_STATE_TEMPLATE.copy()
+    state["signals"] = []
+    state["misconception_topics"] = []
+    state["last_updated"] = _utc_now_iso()
+    return state
 
 
 def _load_sessions() -> None:
-    global _sessions
+    global _sessions, _sessions_by_course
     _ensure_storage()
     try:
-        payload = json.loads(_sessions_file.read_text(encoding="utf-8"))
+        payload = read_json(_sessions_file)
     except Exception:
         payload = {}
 
     if isinstance(payload, dict):
-        _sessions = payload
+        # Normalize once here; create/update keep sessions normalized after,
+        # so read paths can use the stored dicts as-is.
+        _sessions = {
+            session_id: _normalize_session(session)
+            for session_id, session in payload.items()
+            if isinstance(session, dict)
+        }
     else:
         _sessions = {}
 
+    _sessions_by_course = {}
+    for session_id, session in _sessions.items():
+        _index_course(session_id, None, session.get("course_id"))
 
-def _serializable_copy(session: dict[str, Any]) -> dict[str, Any]:
-    # Persist derived lesson artifacts and metadata; skip raw upload image payload.
-    copy = dict(session)
-    copy["image_b64"] = None
-    return copy
 
+def _index_course(session_id: str, old_course_id: str | None, new_course_id: str | None) -> None:
+    if old_course_id == new_course_id:
+        if new_course_id is not None:
+            _sessions_by_course.setdefault(new_course_id, {})[session_id] = None
+        return
+    if old_course_id is not None:
+        members = _sessions_by_course.get(old_course_id)
+        if members is not None:
+            members.pop(session_id, None)
+            if not members:
+                del _sessions_by_course[old_course_id]
+    if new_course_id is not None:
+        _sessions_by_course.setdefault(new_course_id, {})[session_id] = None
 
-def _save_sessions() -> None:
+
+def _write_sessions() -> None:
+    global _sessions_digest
+    if not _sessions_file.exists():
+        _sessions_digest = None
     _ensure_storage()
-    payload = {
-        session_id: _serializable_copy(session)
-        for session_id, session in _sessions.items()
-    }
-    _sessions_file.write_text(
-        json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8"
-    )
+    _sessions_digest = write_json_atomic(_sessions_file, _sessions, _sessions_digest)
+
+
+_sessions_writer = DebouncedWriter(_write_sessions)
+
+
+def _set_session_image(session_id: str, image_b64: str | None) -> bool:
+    """Store or drop a session's upload image; return whether it changed."""
+    if image_b64:
+        if _image_blobs.get(session_id) == image_b64:
+            return False
+        _image_blobs[session_id] = image_b64
+    elif _image_blobs.pop(session_id, None) is None:
+        return False
+    return True
+
+
+def _save_sessions() -> None:
+    _sessions_writer.schedule()
+
+
+def flush_sessions() -> None:
+    """Write any pending session changes to disk now."""
+    _sessions_writer.flush()
+
+
+_LIST_FIELDS = ("steps", "chat_log", "exam_materials", "voice_events")
+_STR_FIELD_DEFAULTS = (
+    ("status", "processing"),
+    ("voice_status", "unknown"),
+    ("build_stage", "received"),
+    ("audio_status", "pending"),
+)
+_OPTIONAL_TEXT_FIELDS = ("course_id", "course_label")
+_LESSON_TYPES = frozenset({"full", "micro"})
+_CONFUSION_LEVELS = frozenset({"low", "medium", "high"})
 
 
 def _normalize_session(session: dict[str, Any]) -> dict[str, Any]:
@@ -88,46 +173,33 @@ def _normalize_session(session: dict[str, Any]) -> dict[str, Any]:
     if not isinstance(updated_at, str) or not updated_at.strip():
         session["updated_at"] = session["created_at"]
 
-    if "steps" not in session or not isinstance(session.get("steps"), list):
-        session["steps"] = []
-    if "chat_log" not in session or not isinstance(session.get("chat_log"), list):
-        session["chat_log"] = []
-    if "status" not in session or not isinstance(session.get("status"), str):
-        session["status"] = "processing"
-    if "step_count" not in session or not isinstance(session.get("step_count"), int):
-        session["step_count"] = len(session.get("steps", []))
-
-    if "voice_status" not in session or not isinstance(session.get("voice_status"), str):
-        session["voice_status"] = "unknown"
-    if "build_stage" not in session or not isinstance(session.get("build_stage"), str):
-        session["build_stage"] = "received"
-    if "audio_status" not in session or not isinstance(session.get("audio_status"), str):
-        session["audio_status"] = "pending"
-
-    if not isinstance(session.get("exam_materials"), list):
-        session["exam_materials"] = []
-    if session.get("exam_cram") is not None and not isinstance(session.get("exam_cram"), dict):
+    get = session.get
+    for key in _LIST_FIELDS:
+        if not isinstance(get(key), list):
+            session[key] = []
+    for key, default in _STR_FIELD_DEFAULTS:
+        if not isinstance(get(key), str):
+            session[key] = default
+    if not isinstance(get("step_count"), int):
+        session["step_count"] = len(session["steps"])
+
+    exam_cram = get("exam_cram")
+    if exam_cram is not None and not isinstance(exam_cram, dict):
         session["exam_cram"] = None
 
-    if session.get("lesson_type") not in {"full", "micro"}:
+    if get("lesson_type") not in _LESSON_TYPES:
         session["lesson_type"] = "full"
-    if not isinstance(session.get("include_voice"), bool):
+    if not isinstance(get("include_voice"), bool):
         session["include_voice"] = True
 
-    course_id = session.get("course_id")
-    if not isinstance(course_id, str) or not course_id.strip():
-        session["course_id"] = None
+    for key in _OPTIONAL_TEXT_FIELDS:
+        value = get(key)
+        if not isinstance(value, str) or not value.strip():
+            session[key] = None
 
-    course_label = session.get("course_label")
-    if not isinstance(course_label, str) or not course_label.strip():
-        session["course_label"] = None
+    session["user_id"] = _normalize_user_id(get("user_id"))
 
-    if not isinstance(session.get("voice_events"), list):
-        session["voice_events"] = []
-
-    session["user_id"] = _normalize_user_id(session.get("user_id"))
-
-    confusion_state = session.get("confusion_state")
+    confusion_state = get("confusion_state")
     if not isinstance(confusion_state, dict):
         session["confusion_state"] = _default_confusion_state()
     else:
@@ -138,7 +210,7 @@ def _normalize_session(session: dict[str, Any]) -> dict[str, Any]:
             normalized_confusion["score"] = max(0.0, min(1.0, float(score)))
         except Exception:
             normalized_confusion["score"] = 0.08
-        if normalized_confusion.get("level") not in {"low", "medium", "high"}:
+        if normalized_confusion.get("level") not in _CONFUSION_LEVELS:
             normalized_confusion["level"] = "low"
         if not isinstance(normalized_confusion.get("signals"), list):
             normalized_confusion["signals"] = []
@@ -151,20 +223,28 @@ def _normalize_session(session: dict[str, Any]) -> dict[str, Any]:
     return session
 
 
-def _is_async_session(value: Any) -> bool:
-    if _SQLAlchemyAsyncSession is not None and isinstance(value, _SQLAlchemyAsyncSession):
-        return True
-    return value.__class__.__name__ == "AsyncSession"
+# Chosen once at import: a single isinstance check when SQLAlchemy is present,
+# the class-name check only when it is not.
+if _SQLAlchemyAsyncSession is not None:
 
+    def _is_async_session(value: Any) -> bool:
+        return isinstance(value, _SQLAlchemyAsyncSession)
 
-def _matches_user(session: dict[str, Any], user_id: str | None) -> bool:
-    normalized = _normalize_user_id(user_id)
-    if normalized is None:
+else:
+
+    def _is_async_session(value: Any) -> bool:
+        return value.__class__.__name__ == "AsyncSession"
+
+
+def _matches_user(session: dict[str, Any], requested_user: str | None) -> bool:
+    # `requested_user` is already normalized, and stored sessions always hold a
+    # normalized `user_id`, so both sides compare as-is.
+    if requested_user is None:
         return True
-    owner = _normalize_user_id(session.get("user_id"))
+    owner = session.get("user_id")
     if owner is None:
         return True
-    return owner == normalized
+    return owner == requested_user
 
 
 def _create_session_sync(
@@ -180,7 +260,11 @@ def _create_session_sync(
     include_voice: bool = True,
     user_id: str | None = None,
 ) -> dict[str, Any]:
-    session_id = str(uuid.uuid4())[:8]
+    session_id = secrets.token_hex(4)
+    # 8 hex chars is a 2**32 space; cheap to rule out a collision outright.
+    while session_id in _sessions:
+        session_id = secrets.token_hex(4)
+    now = _utc_now_iso()
     include_voice_flag = bool(include_voice)
     session = {
         "session_id": session_id,
@@ -188,7 +272,7 @@ def _create_session_sync(
         "title": title,
         "subject": subject,
         "problem_text": problem_text,
-        "image_b64": image_b64,
+        "image_b64": None,
         "step_count": step_count,
         "status": "processing",
         "voice_status": "unknown",
@@ -198,16 +282,19 @@ def _create_session_sync(
         "chat_log": [],
         "course_id": course_id,
         "course_label": course_label,
-        "lesson_type": lesson_type if lesson_type in {"full", "micro"} else "full",
+        "lesson_type": lesson_type if lesson_type in _LESSON_TYPES else "full",
         "include_voice": include_voice_flag,
         "exam_materials": [],
         "exam_cram": None,
-        "created_at": _utc_now_iso(),
-        "updated_at": _utc_now_iso(),
+        "created_at": now,
+        "updated_at": now,
         "confusion_state": _default_confusion_state(),
         "voice_events": [],
     }
+    _set_session_image(session_id, image_b64)
     _sessions[session_id] = _normalize_session(session)
+    _session_revisions[session_id] = next(_revision_counter)
+    _index_course(session_id, None, session["course_id"])
     _save_sessions()
     return _sessions[session_id]
 
@@ -221,14 +308,13 @@ async def _create_session_async(_db: Any, *args: Any, **kwargs: Any) -> dict[str
 
 
 def _get_session_sync(session_id: str, user_id: str | None = None) -> Optional[dict[str, Any]]:
-    session = _sessions.get(session_id)
-    if session is None:
-        return None
-    normalized = _normalize_session(session)
-    if not _matches_user(normalized, user_id):
+    normalized = _sessions.get(session_id)
+    if normalized is None:
         return None
     requested_user = _normalize_user_id(user_id)
-    if requested_user and _normalize_user_id(normalized.get("user_id")) is None:
+    if not _matches_user(normalized, requested_user):
+        return None
+    if requested_user and normalized.get("user_id") is None:
         normalized["user_id"] = requested_user
         _save_sessions()
     return normalized
@@ -242,6 +328,17 @@ async def _get_session_async(
     return _get_session_sync(session_id, user_id=user_id)
 
 
+def _value_changed(current: dict[str, Any], key: str, value: Any) -> bool:
+    if key not in current:
+        return True
+    existing = current[key]
+    # Callers mutate lists/dicts such as chat_log in place and pass the same
+    # object back, so identity says nothing about whether it changed.
+    if existing is value and isinstance(value, (list, dict)):
+        return True
+    return existing != value
+
+
 def _update_session_sync(
     session_id: str,
     *,
@@ -251,19 +348,33 @@ def _update_session_sync(
     if session_id not in _sessions:
         return None
 
-    current = _normalize_session(_sessions[session_id])
-    if not _matches_user(current, user_id):
+    current = _sessions[session_id]
+    requested_user = _normalize_user_id(user_id)
+    if not _matches_user(current, requested_user):
         return None
 
-    requested_user = _normalize_user_id(user_id)
-    if requested_user and _normalize_user_id(current.get("user_id")) is None:
-        _sessions[session_id]["user_id"] = requested_user
+    changed = False
+    if requested_user and current.get("user_id") is None:
+        current["user_id"] = requested_user
+        changed = True
 
     kwargs.pop("user_id", None)
+    if "image_b64" in kwargs:
+        changed = _set_session_image(session_id, kwargs.pop("image_b64")) or changed
 
+    if not changed and not any(
+        _value_changed(current, key, value) for key, value in kwargs.items()
+    ):
+        # Idempotent retries and polling updates: leave updated_at alone and
+        # skip the rewrite.
+        return current
+
+    previous_course_id = current.get("course_id")
     _sessions[session_id].update(kwargs)
     _sessions[session_id]["updated_at"] = _utc_now_iso()
     _normalize_session(_sessions[session_id])
+    _session_revisions[session_id] = next(_revision_counter)
+    _index_course(session_id, previous_course_id, _sessions[session_id]["course_id"])
     _save_sessions()
     return _sessions[session_id]
 
@@ -279,15 +390,12 @@ async def _update_session_async(
 
 
 def _list_sessions_sync(user_id: str | None = None) -> list[dict[str, Any]]:
+    requested_user = _normalize_user_id(user_id)
     sessions = [
-        _normalize_session(session)
-        for session in _sessions.values()
-        if _matches_user(_normalize_session(session), user_id)
+        session for session in _sessions.values() if _matches_user(session, requested_user)
     ]
-    sessions.sort(
-        key=lambda item: item.get("updated_at") or item.get("created_at") or "",
-        reverse=True,
-    )
+    # updated_at is always a non-empty string after normalization.
+    sessions.sort(key=itemgetter("updated_at"), reverse=True)
     return sessions
 
 
@@ -341,53 +449,74 @@ def list_sessions(*args: Any, **kwargs: Any):
     return _list_sessions_sync(user_id=user_id)
 
 
+def get_session_image(session_id: str) -> str | None:
+    """Return the base64 upload image for a session, if it has one."""
+    return _image_blobs.get(session_id)
+
+
+def get_session_revision(session_id: str) -> int:
+    """Return a number that changes whenever the session's stored fields change."""
+    return _session_revisions.get(session_id, 0)
+
+
+def _problem_preview(problem_text: Any) -> str:
+    if not isinstance(problem_text, str):
+        problem_text = str(problem_text)
+    # Short, already-trimmed text (the common case) is returned as-is.
+    if len(problem_text) <= 180 and not (
+        problem_text[:1].isspace() or problem_text[-1:].isspace()
+    ):
+        return problem_text
+    preview = problem_text.strip()
+    if len(preview) > 180:
+        preview = preview[:177].rstrip() + "..."
+    return preview
+
+
 def list_sessions_for_course(
     course_id: str, limit: int = 20, user_id: str | None = None
 ) -> list[dict[str, Any]]:
-    rows: list[dict[str, Any]] = []
-    for session in _sessions.values():
-        normalized = _normalize_session(session)
-        if normalized.get("course_id") != course_id:
-            continue
-        if not _matches_user(normalized, user_id):
-            continue
-
-        problem_preview = str(normalized.get("problem_text", "")).strip()
-        if len(problem_preview) > 180:
-            problem_preview = problem_preview[:177].rstrip() + "..."
-
-        rows.append(
-            {
-                "session_id": normalized.get("session_id"),
-                "title": normalized.get("title"),
-                "subject": normalized.get("subject"),
-                "status": normalized.get("status"),
-                "step_count": normalized.get("step_count", 0),
-                "lesson_type": normalized.get("lesson_type", "full"),
-                "created_at": normalized.get("created_at"),
-                "problem_preview": problem_preview,
-            }
-        )
-
-    rows.sort(
-        key=lambda row: str(row.get("created_at") or ""),
-        reverse=True,
+    requested_user = _normalize_user_id(user_id)
+    sessions = (
+        session
+        for session in map(_sessions.__getitem__, _sessions_by_course.get(course_id, ()))
+        if _matches_user(session, requested_user)
     )
-    return rows[:limit]
+    # Keep only the newest `limit` sessions before building any rows. The
+    # index follows insertion order, which a course_id change can break, so
+    # it cannot stand in for created_at order. created_at is always an ISO
+    # string after normalization.
+    newest = heapq.nlargest(limit, sessions, key=itemgetter("created_at"))
+    return [
+        {
+            "session_id": session.get("session_id"),
+            "title": session.get("title"),
+            "subject": session.get("subject"),
+            "status": session["status"],
+            "step_count": session["step_count"],
+            "lesson_type": session["lesson_type"],
+            "created_at": session["created_at"],
+            "problem_preview": _problem_preview(session.get("problem_text", "")),
+        }
+        for session in newest
+    ]
 
 
 def delete_sessions_for_course(course_id: str, user_id: str | None = None) -> int:
+    requested_user = _normalize_user_id(user_id)
     to_remove = [
         session_id
-        for session_id, session in _sessions.items()
-        if _normalize_session(session).get("course_id") == course_id
-        and _matches_user(_normalize_session(session), user_id)
+        for session_id in _sessions_by_course.get(course_id, ())
+        if _matches_user(_sessions[session_id], requested_user)
     ]
     if not to_remove:
         return 0
 
     for session_id in to_remove:
         _sessions.pop(session_id, None)
+        _set_session_image(session_id, None)
+        _session_revisions.pop(session_id, None)
+        _index_course(session_id, course_id, None)
     _save_sessions()
     return len(to_remove)
 
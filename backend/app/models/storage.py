@@ -0,0 +1,99 @@
+"""JSON file persistence shared by the in-memory models."""
+
+import atexit
+import hashlib
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+_DUMP_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+
+def read_json(path: Path) -> Any:
+    """Parse a JSON file straight from its bytes with orjson."""
+    return orjson.loads(path.read_bytes())
+
+
+def write_json_atomic(
+    path: Path, payload: Any, previous_digest: bytes | None = None
+) -> bytes:
+    """Serialize `payload` to `path`, swapping the file in with one rename.
+
+    Readers never see a half-written file: the bytes go to a sibling temp file
+    first and `os.replace` moves it over the old one. Returns a digest of the
+    encoded bytes; when it equals `previous_digest` and the file is still
+    there, the write is skipped.
+    """
+    data = orjson.dumps(payload, option=_DUMP_OPTIONS)
+    digest = hashlib.blake2b(data, digest_size=16).digest()
+    if digest == previous_digest and path.exists():
+        return digest
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as handle:
+        handle.write(data)
+    os.replace(tmp_path, path)
+    return digest
+
+
+class DebouncedWriter:
+    """Coalesce bursts of save requests into one background write.
+
+    `schedule()` only marks the store dirty and wakes a long-lived daemon
+    thread, so request handlers never serialize or touch the disk. The thread
+    waits `delay` seconds to let a burst settle, then runs `write` once for
+    however many changes piled up. `flush()` writes synchronously and is called
+    at interpreter exit so pending changes are not lost.
+    """
+
+    def __init__(self, write: Callable[[], None], delay: float = 0.25) -> None:
+        self._write = write
+        self._delay = delay
+        self._state_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._dirty = False
+        atexit.register(self.flush)
+
+    def schedule(self) -> None:
+        with self._state_lock:
+            self._dirty = True
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="json-writer", daemon=True
+                )
+                self._thread.start()
+        self._pending.set()
+
+    def _run(self) -> None:
+        while True:
+            self._pending.wait()
+            time.sleep(self._delay)
+            self._pending.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Background JSON write failed")
+
+    def flush(self) -> None:
+        # Any change scheduled after the dirty flag is cleared re-arms the
+        # thread, so nothing is dropped between the check and the write.
+        with self._write_lock:
+            with self._state_lock:
+                if not self._dirty:
+                    return
+                self._dirty = False
+            try:
+                self._write()
+            except Exception:
+                with self._state_lock:
+                    self._dirty = True
+                raise
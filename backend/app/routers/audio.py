@@ -1,15 +1,35 @@
 """Audio serving endpoint."""
 
+import functools
 import mimetypes
 import os
+import stat
+from pathlib import Path
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from fastapi.responses import FileResponse
 
 from app.services.voice_service import get_voice_service
 
 router = APIRouter()
 
+_AUDIO_CACHE_DIR = Path("audio_cache").resolve()
+# Cached filenames embed a hash of the spoken text, so a given URL never changes.
+_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@functools.lru_cache(maxsize=1024)
+def _resolve_audio(filename: str) -> tuple[str, str] | None:
+    """Return (path, media_type) for a servable filename, or None if it escapes the cache dir."""
+    candidate = (_AUDIO_CACHE_DIR / filename).resolve()
+
+    # Prevent directory traversal attacks
+    if not candidate.is_relative_to(_AUDIO_CACHE_DIR):
+        return None
+
+    media_type = mimetypes.guess_type(candidate.name)[0] or "application/octet-stream"
+    return str(candidate), media_type
+
 
 @router.get("/health")
 async def voice_health(force: bool = Query(default=False)):
@@ -20,24 +40,42 @@ async def voice_health(force: bool = Query(default=False)):
 
 
 @router.get("/{filename}")
-async def serve_audio(filename: str):
+async def serve_audio(filename: str, request: Request):
     """Serve cached audio files.
 
     Args:
         filename: Name of the audio file to serve
 
     Returns:
-        FileResponse with audio file
+        FileResponse with audio file, or 304 when the client's ETag matches
     """
     # Security: only allow serving files from audio_cache directory
-    file_path = os.path.join("audio_cache", filename)
-
-    # Prevent directory traversal attacks
-    if not os.path.abspath(file_path).startswith(os.path.abspath("audio_cache")):
+    resolved = _resolve_audio(filename)
+    if resolved is None:
         raise HTTPException(status_code=403, detail="Access denied")
+    file_path, media_type = resolved
 
-    if not os.path.exists(file_path):
+    # Stat per request (files can be written or evicted at any time) and hand
+    # the result to FileResponse so it does not stat again.
+    try:
+        stat_result = os.stat(file_path)
+    except OSError:
+        stat_result = None
+    if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
         raise HTTPException(status_code=404, detail="Audio file not found")
 
-    media_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
-    return FileResponse(file_path, media_type=media_type)
+    response = FileResponse(
+        file_path,
+        media_type=media_type,
+        stat_result=stat_result,
+        headers={"Cache-Control": _CACHE_CONTROL},
+    )
+    etag = response.headers["etag"]
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and any(
+        candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(",")
+    ):
+        return Response(
+            status_code=304, headers={"ETag": etag, "Cache-Control": _CACHE_CONTROL}
+        )
+    return response
@@ -0,0 +1,59 @@
+"""Development-only endpoints that serve the canned mock lesson."""
+
+from fastapi import APIRouter, Request, Response
+
+from app.mock.responses import (
+    get_lesson_steps_bytes,
+    get_lesson_steps_etag,
+    get_lesson_steps_gzip,
+)
+
+router = APIRouter()
+
+_CACHE_CONTROL = "public, max-age=3600"
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def _accepts_gzip(accept_encoding: str | None) -> bool:
+    if not accept_encoding:
+        return False
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() != "gzip":
+            continue
+        quality = params.strip().lower().removeprefix("q=")
+        return quality not in ("0", "0.0", "0.00", "0.000")
+    return False
+
+
+@router.get("/session")
+async def mock_session(request: Request):
+    """Return every mock lesson step in a single pre-encoded response.
+
+    The body never changes at runtime, so clients that send back the ETag get
+    a 304 without the body, and gzip-capable clients get bytes compressed once
+    at build time.
+    """
+    use_gzip = _accepts_gzip(request.headers.get("accept-encoding"))
+    etag = get_lesson_steps_etag()
+    if use_gzip:
+        etag = etag[:-1] + '-gzip"'
+    headers = {"ETag": etag, "Cache-Control": _CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        body = get_lesson_steps_gzip()
+    else:
+        body = get_lesson_steps_bytes()
+    return Response(content=body, media_type="application/json", headers=headers)
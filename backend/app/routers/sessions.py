@@ -1,12 +1,20 @@
 import base64
 import logging
+from collections import OrderedDict
 from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+import orjson
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Response, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.course import get_course, search_course_snippets
-from app.models.session import create_session, get_session, list_sessions, update_session
+from app.models.session import (
+    create_session,
+    get_session,
+    get_session_revision,
+    list_sessions,
+    update_session,
+)
 from app.auth import get_current_user_id
 from app.database import get_db
 from app.schemas.session import (
@@ -23,6 +31,11 @@ logger = logging.getLogger(__name__)
 
 _MAX_UPLOAD_BYTES = 10 * 1024 * 1024
 
+# session_id -> (revision, encoded SessionResponse). The frontend polls GET
+# /sessions/{id} while a lesson builds; between updates the body is identical.
+_SESSION_BYTES_CACHE_SIZE = 256
+_session_bytes_cache: OrderedDict[str, tuple[int, bytes]] = OrderedDict()
+
 
 def _error_message(exc: Exception) -> str:
     msg = str(exc).strip()
@@ -56,6 +69,22 @@ def _build_session_response(session: dict[str, Any]) -> SessionResponse:
     )
 
 
+def _session_response_bytes(session: dict[str, Any]) -> bytes:
+    session_id = session["session_id"]
+    revision = get_session_revision(session_id)
+    cached = _session_bytes_cache.get(session_id)
+    if cached is not None and cached[0] == revision:
+        _session_bytes_cache.move_to_end(session_id)
+        return cached[1]
+
+    body = orjson.dumps(_build_session_response(session).model_dump(mode="json"))
+    _session_bytes_cache[session_id] = (revision, body)
+    _session_bytes_cache.move_to_end(session_id)
+    if len(_session_bytes_cache) > _SESSION_BYTES_CACHE_SIZE:
+        _session_bytes_cache.popitem(last=False)
+    return body
+
+
 def _resolve_course_context(
     *,
     course_id: str | None,
@@ -155,7 +184,7 @@ async def get_session_info(
     session = await get_session(db, session_id, user_id)
     if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
-    return _build_session_response(session)
+    return Response(content=_session_response_bytes(session), media_type="application/json")
 
 
 @router.post("", response_model=SessionResponse)
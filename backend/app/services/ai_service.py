@@ -3,7 +3,7 @@
 import asyncio
 import json
 import logging
-import uuid
+import secrets
 from typing import Any
 
 import google.generativeai as genai
@@ -616,7 +616,7 @@ Guidelines:
 
 def _generate_event_id(step_number: int, event_index: int) -> str:
     """Generate a unique, deterministic event ID."""
-    return f"s{step_number}_e{event_index}_{uuid.uuid4().hex[:6]}"
+    return f"s{step_number}_e{event_index}_{secrets.token_hex(3)}"
 
 
 def _coerce_float(value: Any) -> float | None:
@@ -1031,7 +1031,7 @@ def _process_event_stream(
         event_id = (
             _generate_event_id(step_number, i + event_index_offset)
             if step_number is not None
-            else f"{id_prefix}_{i}_{uuid.uuid4().hex[:6]}"
+            else f"{id_prefix}_{i}_{secrets.token_hex(3)}"
         )
         payload = _build_common_payload(raw)
 
@@ -1326,7 +1326,7 @@ def _repair_step_events(events: list[dict], step_number: int, step_title: str) -
 
 
 def _mark_chat_events_temporary(events: list[dict]) -> list[dict]:
-    group_id = f"chat_{uuid.uuid4().hex[:8]}"
+    group_id = f"chat_{secrets.token_hex(4)}"
     repaired: list[dict] = []
     visual_ids: list[str] = []
     narrate_count = 0
@@ -1,5 +1,5 @@
 import re
-import uuid
+import secrets
 from typing import Any
 
 from app.models.course import get_course, search_course_snippets
@@ -68,7 +68,7 @@ def _estimate_text_duration_ms(text: str, minimum: int = 900, maximum: int = 420
 
 def _event(event_type: str, duration: int, payload: dict[str, Any]) -> dict[str, Any]:
     return {
-        "id": f"chat-{uuid.uuid4().hex[:10]}",
+        "id": f"chat-{secrets.token_hex(5)}",
         "type": event_type,
         "duration": max(duration, 200),
         "payload": payload,
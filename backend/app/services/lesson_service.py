@@ -4,7 +4,7 @@ import json
 import logging
 from typing import AsyncGenerator
 
-from app.models.session import get_session, update_session
+from app.models.session import get_session, get_session_image, update_session
 from app.services.ai_service import analyze_problem
 from app.services.voice_service import get_voice_service
 from app.schemas.lesson import LessonStep, LessonComplete
@@ -242,7 +242,7 @@ async def create_lesson(session_id: str) -> None:
     logger.info("[LessonService] No existing steps, generating with Gemini...")
     result = await analyze_problem(
         problem_text=session.get("problem_text", ""),
-        image_b64=session.get("image_b64"),
+        image_b64=get_session_image(session_id),
     )
 
     all_steps = result.get("steps", [])
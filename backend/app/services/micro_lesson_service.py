@@ -1,6 +1,6 @@
 import asyncio
 import re
-import uuid
+import secrets
 from typing import Any
 
 from app.services.voice_service import get_voice_service
@@ -18,7 +18,7 @@ def _estimate_text_duration_ms(text: str, minimum: int = 900, maximum: int = 650
 
 def _event(event_type: str, duration: int, payload: dict[str, Any]) -> dict[str, Any]:
     return {
-        "id": f"micro-{uuid.uuid4().hex[:10]}",
+        "id": f"micro-{secrets.token_hex(5)}",
         "type": event_type,
         "duration": max(200, int(duration)),
         "payload": payload,
@@ -0,0 +1,186 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+import unittest
+from unittest import mock
+
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from fastapi import HTTPException, Request
+
+from app import auth
+
+_SECRET = "test-nextauth-secret"
+
+
+def _b64url(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _make_token(payload: dict, secret: str = _SECRET) -> str:
+    header = _b64url(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+    body = _b64url(json.dumps(payload).encode())
+    signing_input = f"{header}.{body}".encode()
+    signature = hmac.new(secret.encode(), signing_input, hashlib.sha256).digest()
+    return f"{header}.{body}.{_b64url(signature)}"
+
+
+class AuthHeaderTests(unittest.TestCase):
+    def test_bearer_prefix_is_case_insensitive(self):
+        for header in ("Bearer abc", "bearer abc", "BEARER abc", "BeArEr abc"):
+            self.assertEqual(auth._get_token_from_auth_header(header), "abc")
+
+    def test_non_bearer_header_is_ignored(self):
+        self.assertIsNone(auth._get_token_from_auth_header(None))
+        self.assertIsNone(auth._get_token_from_auth_header(""))
+        self.assertIsNone(auth._get_token_from_auth_header("Basic abc"))
+        self.assertIsNone(auth._get_token_from_auth_header("Bearer"))
+
+
+class CookieHeaderTests(unittest.TestCase):
+    def test_prefers_plain_session_cookie(self):
+        header = b"__Secure-next-auth.session-token=secure; next-auth.session-token=plain"
+        self.assertEqual(auth._get_token_from_cookie_header(header), "plain")
+
+    def test_reads_secure_session_cookie(self):
+        header = b"theme=dark; __Secure-next-auth.session-token=secure"
+        self.assertEqual(auth._get_token_from_cookie_header(header), "secure")
+
+    def test_missing_or_empty_cookie(self):
+        self.assertIsNone(auth._get_token_from_cookie_header(None))
+        self.assertIsNone(auth._get_token_from_cookie_header(b"theme=dark"))
+        self.assertIsNone(auth._get_token_from_cookie_header(b"next-auth.session-token="))
+
+
+class DecodeUserIdTests(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(auth, "NEXTAUTH_SECRET_BYTES", _SECRET.encode())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        auth._token_cache.clear()
+        self.addCleanup(auth._token_cache.clear)
+
+    def test_valid_token_is_decoded_and_cached(self):
+        token = _make_token({"sub": "user-1", "exp": int(time.time()) + 3600})
+        self.assertEqual(auth._decode_user_id(token), "user-1")
+        self.assertIn(token, auth._token_cache)
+
+        with mock.patch.object(auth, "_verify_hs256", side_effect=AssertionError):
+            self.assertEqual(auth._decode_user_id(token), "user-1")
+
+    def test_cache_entry_never_outlives_token_exp(self):
+        exp = int(time.time()) + 30
+        token = _make_token({"sub": "user-1", "exp": exp})
+        auth._decode_user_id(token)
+        self.assertLessEqual(auth._token_cache[token].expires_at, exp)
+
+    def test_full_cache_evicts_oldest_entry(self):
+        with mock.patch.object(auth, "_TOKEN_CACHE_MAX_ENTRIES", 2):
+            auth._cache_user_id("a", "user-a", None)
+            auth._cache_user_id("b", "user-b", None)
+            auth._cache_user_id("c", "user-c", None)
+        self.assertEqual(list(auth._token_cache), ["b", "c"])
+
+    def test_invalid_token_is_not_cached(self):
+        token = _make_token({"sub": "user-1", "exp": int(time.time()) + 3600}, secret="wrong")
+        with self.assertRaises(HTTPException) as ctx:
+            auth._decode_user_id(token)
+        self.assertEqual(ctx.exception.status_code, 401)
+        self.assertNotIn(token, auth._token_cache)
+
+    def test_token_with_other_algorithm_is_rejected(self):
+        token = _make_token({"sub": "user-1", "exp": int(time.time()) + 3600})
+        header = _b64url(json.dumps({"alg": "none", "typ": "JWT"}).encode())
+        forged = ".".join([header, *token.split(".")[1:]])
+        with self.assertRaises(HTTPException) as ctx:
+            auth._decode_user_id(forged)
+        self.assertEqual(ctx.exception.status_code, 401)
+
+    def test_malformed_token_is_rejected(self):
+        for token in ("", "abc", "a.b", "a.b.c.d", "!!.??.**"):
+            with self.assertRaises(HTTPException) as ctx:
+                auth._decode_user_id(token)
+            self.assertEqual(ctx.exception.status_code, 401)
+
+    def test_oversized_token_is_rejected_before_verification(self):
+        token = _make_token({"sub": "user-1", "pad": "x" * 9000})
+        with mock.patch.object(auth, "_verify_hs256", side_effect=AssertionError):
+            with self.assertRaises(HTTPException) as ctx:
+                auth._decode_user_id(token)
+        self.assertEqual(ctx.exception.status_code, 401)
+
+    def test_non_string_subject_is_rejected(self):
+        for sub in (123, {"id": "user-1"}, ["user-1"], True, ""):
+            token = _make_token({"sub": sub, "exp": int(time.time()) + 3600})
+            with self.assertRaises(HTTPException) as ctx:
+                auth._decode_user_id(token)
+            self.assertEqual(ctx.exception.status_code, 401)
+            self.assertNotIn(token, auth._token_cache)
+
+    def test_rejections_are_fresh_and_unchained(self):
+        token = _make_token({"sub": "user-1", "exp": int(time.time()) + 3600}, secret="wrong")
+        raised = []
+        for _ in range(2):
+            with self.assertRaises(HTTPException) as ctx:
+                auth._decode_user_id(token)
+            raised.append(ctx.exception)
+        self.assertIsNot(raised[0], raised[1])
+        self.assertIsNone(raised[1].__cause__)
+        self.assertTrue(raised[1].__suppress_context__)
+
+    def test_token_with_audience_is_rejected(self):
+        for aud in ("other-app", ["doceo"], None):
+            token = _make_token({"sub": "user-1", "aud": aud, "exp": int(time.time()) + 3600})
+            with self.assertRaises(HTTPException) as ctx:
+                auth._decode_user_id(token)
+            self.assertEqual(ctx.exception.status_code, 401)
+
+    def test_non_numeric_iat_is_rejected(self):
+        now = int(time.time())
+        for iat in ("yesterday", True, [now]):
+            token = _make_token({"sub": "user-1", "iat": iat, "exp": now + 3600})
+            with self.assertRaises(HTTPException) as ctx:
+                auth._decode_user_id(token)
+            self.assertEqual(ctx.exception.status_code, 401)
+
+        token = _make_token({"sub": "user-1", "iat": now, "exp": now + 3600})
+        self.assertEqual(auth._decode_user_id(token), "user-1")
+
+    def test_expired_token_is_rejected(self):
+        token = _make_token({"sub": "user-1", "exp": int(time.time()) - 10})
+        with self.assertRaises(HTTPException) as ctx:
+            auth._decode_user_id(token)
+        self.assertEqual(ctx.exception.status_code, 401)
+
+
+class CurrentUserDependencyTests(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(auth, "NEXTAUTH_SECRET_BYTES", _SECRET.encode())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.token = _make_token({"sub": "user-1", "exp": int(time.time()) + 3600})
+
+    def _request(self, headers: list[tuple[bytes, bytes]]) -> Request:
+        return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+    def test_reads_bearer_token_from_raw_headers(self):
+        request = self._request([(b"authorization", f"Bearer {self.token}".encode())])
+        self.assertEqual(asyncio.run(auth.get_current_user_id(request)), "user-1")
+
+    def test_falls_back_to_session_cookie(self):
+        cookie = f"theme=dark; next-auth.session-token={self.token}".encode()
+        request = self._request([(b"cookie", cookie)])
+        self.assertEqual(asyncio.run(auth.get_current_user_id(request)), "user-1")
+
+    def test_missing_credentials_are_rejected(self):
+        with self.assertRaises(HTTPException) as ctx:
+            asyncio.run(auth.get_current_user_id(self._request([])))
+        self.assertEqual(ctx.exception.status_code, 401)
+
+
+if __name__ == "__main__":
+    unittest.main()
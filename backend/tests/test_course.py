@@ -0,0 +1,98 @@
+import codecs
+import io
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+from app.models import course
+
+_W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def _docx(body: str, namespace: str = _W) -> bytes:
+    xml = f'<w:document xmlns:w="{namespace}"><w:body>{body}</w:body></w:document>'
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("word/document.xml", xml)
+    return buffer.getvalue()
+
+
+class DocxExtractionTests(unittest.TestCase):
+    def test_extracts_text_runs_in_order(self):
+        body = (
+            "<w:p><w:r><w:t>First</w:t></w:r><w:r><w:t> line</w:t></w:r></w:p>"
+            "<w:tbl><w:tr><w:tc><w:p><w:r><w:t>Cell</w:t></w:r></w:p></w:tc></w:tr></w:tbl>"
+            "<w:p><w:r><w:rPr><w:b/></w:rPr><w:t>Last</w:t></w:r></w:p>"
+        )
+        self.assertEqual(course._extract_docx_text(_docx(body)), "First\n line\nCell\nLast")
+
+    def test_strict_ooxml_namespace(self):
+        body = "<w:p><w:r><w:t>Strict</w:t></w:r></w:p>"
+        strict = "http://purl.oclc.org/ooxml/wordprocessingml/main"
+        self.assertEqual(course._extract_docx_text(_docx(body, strict)), "Strict")
+
+    def test_invalid_archive_is_rejected(self):
+        with self.assertRaises(ValueError):
+            course._extract_docx_text(b"not a zip")
+
+
+class DecodeTextBytesTests(unittest.TestCase):
+    def test_utf16le_with_bom(self):
+        raw = codecs.BOM_UTF16_LE + "Intégrale ∫".encode("utf-16-le")
+        self.assertEqual(course._decode_text_bytes(raw), "Intégrale ∫")
+
+    def test_utf8_bom_is_stripped(self):
+        raw = codecs.BOM_UTF8 + "Dérivée".encode("utf-8")
+        self.assertEqual(course._decode_text_bytes(raw), "Dérivée")
+
+    def test_invalid_utf8_falls_back_to_latin1(self):
+        raw = "café".encode("latin-1") + b"\xff"
+        self.assertEqual(course._decode_text_bytes(raw), "café\xff")
+
+
+class FileSuffixTests(unittest.TestCase):
+    def test_matches_pathlib_suffix(self):
+        for filename in (
+            "notes.PDF",
+            "archive.tar.gz",
+            ".pdf",
+            ".bashrc",
+            "dir.d/file",
+            "dir.d/notes.md",
+            "trailing.",
+            "..",
+            "README",
+            "",
+        ):
+            with self.subTest(filename=filename):
+                self.assertEqual(course._file_suffix(filename), Path(filename).suffix.lower())
+
+
+class ChunkScoringTests(unittest.TestCase):
+    def _score(self, text: str, query: str) -> int:
+        return course._score_chunk(
+            text.lower(), course._tokenize_query(query), query.lower().strip()
+        )
+
+    def test_tokens_count_as_substrings(self):
+        # Phrase bonus (+8) applies too: the query is a substring of the text.
+        self.assertEqual(self._score("Derivatives of polynomials", "derivative"), 2 + 8)
+        self.assertEqual(self._score("Antiderivative tables", "derivative graph"), 2)
+
+    def test_per_token_count_is_capped(self):
+        text = " ".join(["limit"] * 10)
+        self.assertEqual(self._score(text, "limit"), 4 * 2 + 8)
+
+    def test_search_ranks_by_score(self):
+        chunks = [
+            {"text": "Integrals of rational functions", "material_id": "m1"},
+            {"text": "Derivatives and derivative rules", "material_id": "m2"},
+        ]
+        with mock.patch.object(course, "get_course", return_value={"chunks": chunks}):
+            results = course.search_course_snippets("c1", "derivative rules", top_k=1)
+        self.assertEqual([result["material_id"] for result in results], ["m2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
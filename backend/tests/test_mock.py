@@ -0,0 +1,88 @@
+import asyncio
+import gzip
+import unittest
+
+import orjson
+from fastapi import Request
+
+from app.mock import responses
+from app.routers import mock
+
+
+def _request(headers: list[tuple[bytes, bytes]] | None = None) -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers or []})
+
+
+class MockResponsesTests(unittest.TestCase):
+    def test_lesson_bytes_match_lesson_steps(self):
+        decoded = orjson.loads(responses.get_lesson_steps_bytes())
+        self.assertEqual(len(decoded), len(responses.MOCK_LESSON_STEPS))
+        self.assertEqual(decoded[0]["step_number"], 1)
+
+    def test_chat_response_by_intent(self):
+        how = orjson.loads(responses.get_chat_response("how"))
+        self.assertEqual(how["role"], "tutor")
+        self.assertEqual(how["related_step"], 3)
+        self.assertTrue(
+            how["message"].startswith(
+                "Here's the step-by-step process for differentiating any polynomial:"
+            )
+        )
+
+        why = orjson.loads(responses.get_chat_response(responses.Intent.WHY))
+        self.assertEqual(why["related_step"], 2)
+        self.assertTrue(why["message"].startswith("Great question! The power rule works"))
+
+    def test_chat_response_falls_back_to_default(self):
+        default = orjson.loads(responses.get_chat_response("unknown"))
+        self.assertIsNone(default["related_step"])
+        self.assertTrue(default["message"].startswith("That's a thoughtful question!"))
+        self.assertEqual(
+            default["math_blocks"][0]["latex"], r"\frac{d}{dx}[ax^n] = a \cdot n \cdot x^{n-1}"
+        )
+
+    def test_math_blocks_are_shared_per_latex_and_display(self):
+        block = responses._m("x^2")
+        self.assertIs(responses._m("x^2"), block)
+        inline = responses._m("x^2", display=False)
+        self.assertFalse(inline["display"])
+        self.assertTrue(block["display"])
+
+    def test_columnar_events_round_trip(self):
+        rows = [dict(event) for step in responses.MOCK_LESSON_STEPS for event in step["events"]]
+        self.assertEqual(responses.events_to_rows(), rows)
+        narrate = responses.filter_by_type("narrate")
+        self.assertTrue(narrate)
+        self.assertTrue(all(rows[i]["type"] == "narrate" for i in narrate))
+
+
+class MockSessionRouteTests(unittest.TestCase):
+    def test_returns_body_with_etag(self):
+        response = asyncio.run(mock.mock_session(_request()))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.body, responses.get_lesson_steps_bytes())
+        self.assertEqual(response.headers["etag"], responses.get_lesson_steps_etag())
+
+    def test_matching_etag_returns_not_modified(self):
+        etag = responses.get_lesson_steps_etag().encode()
+        response = asyncio.run(mock.mock_session(_request([(b"if-none-match", etag)])))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.body, b"")
+
+    def test_gzip_variant_when_accepted(self):
+        response = asyncio.run(
+            mock.mock_session(_request([(b"accept-encoding", b"br, gzip;q=0.8")]))
+        )
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.body), responses.get_lesson_steps_bytes())
+        self.assertNotEqual(response.headers["etag"], responses.get_lesson_steps_etag())
+
+    def test_gzip_refused_with_zero_quality(self):
+        response = asyncio.run(
+            mock.mock_session(_request([(b"accept-encoding", b"gzip;q=0")]))
+        )
+        self.assertNotIn("content-encoding", response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+import os
+import tempfile
+import unittest
+from collections import OrderedDict
+from pathlib import Path
+from unittest import mock
+
+import orjson
+
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from app.models import session as session_model
+from app.models.storage import read_json
+from app.routers import sessions as sessions_router
+
+
+class SessionStoreTestCase(unittest.TestCase):
+    """Points the session store at an empty temporary data directory."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        data_dir = Path(tmp.name)
+        self.sessions_file = data_dir / "sessions.json"
+        for name, value in (
+            ("_data_dir", data_dir),
+            ("_sessions_file", self.sessions_file),
+            ("_sessions", {}),
+            ("_image_blobs", {}),
+            ("_sessions_by_course", {}),
+            ("_session_revisions", {}),
+            ("_sessions_digest", None),
+        ):
+            patcher = mock.patch.object(session_model, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # Cleanups run last-in first-out: write anything pending while the
+        # temporary paths are still patched in.
+        self.addCleanup(session_model.flush_sessions)
+
+    def _create(self, **kwargs):
+        kwargs.setdefault("title", "Limits")
+        kwargs.setdefault("subject", "Calculus")
+        return session_model.create_session(**kwargs)
+
+
+class UpdateSessionTests(SessionStoreTestCase):
+    def test_identical_update_is_a_no_op(self):
+        session = self._create(course_id="c1")
+        session_id = session["session_id"]
+        revision = session_model.get_session_revision(session_id)
+        updated_at = session["updated_at"]
+
+        with mock.patch.object(session_model, "_save_sessions") as save:
+            result = session_model.update_session(
+                session_id, status=session["status"], course_id="c1"
+            )
+
+        save.assert_not_called()
+        self.assertIs(result, session)
+        self.assertEqual(result["updated_at"], updated_at)
+        self.assertEqual(session_model.get_session_revision(session_id), revision)
+
+    def test_in_place_list_mutation_counts_as_change(self):
+        session = self._create()
+        session_id = session["session_id"]
+        revision = session_model.get_session_revision(session_id)
+
+        chat_log = session["chat_log"]
+        chat_log.append({"role": "user", "content": "Why?"})
+        with mock.patch.object(session_model, "_save_sessions") as save:
+            session_model.update_session(session_id, chat_log=chat_log)
+
+        save.assert_called_once()
+        self.assertGreater(session_model.get_session_revision(session_id), revision)
+
+    def test_real_change_bumps_revision_and_is_flushed(self):
+        session_id = self._create()["session_id"]
+        session_model.flush_sessions()
+        revision = session_model.get_session_revision(session_id)
+
+        session_model.update_session(session_id, status="complete")
+        self.assertGreater(session_model.get_session_revision(session_id), revision)
+
+        session_model.flush_sessions()
+        self.assertEqual(read_json(self.sessions_file)[session_id]["status"], "complete")
+
+
+class CourseIndexTests(SessionStoreTestCase):
+    def test_moving_course_updates_both_buckets(self):
+        session_id = self._create(course_id="c1")["session_id"]
+        session_model.update_session(session_id, course_id="c2")
+
+        self.assertNotIn("c1", session_model._sessions_by_course)
+        self.assertEqual(list(session_model._sessions_by_course["c2"]), [session_id])
+        self.assertEqual(session_model.list_sessions_for_course("c1"), [])
+        self.assertEqual(
+            [row["session_id"] for row in session_model.list_sessions_for_course("c2")],
+            [session_id],
+        )
+
+    def test_deleting_course_sessions_empties_the_bucket(self):
+        kept = self._create(course_id="c1", user_id="other")["session_id"]
+        removed = self._create(course_id="c1", user_id="owner")["session_id"]
+
+        self.assertEqual(session_model.delete_sessions_for_course("c1", user_id="owner"), 1)
+        self.assertEqual(list(session_model._sessions_by_course["c1"]), [kept])
+        self.assertNotIn(removed, session_model._sessions)
+
+        self.assertEqual(session_model.delete_sessions_for_course("c1"), 1)
+        self.assertNotIn("c1", session_model._sessions_by_course)
+
+    def test_course_listing_filters_by_owner(self):
+        mine = self._create(course_id="c1", user_id="owner")["session_id"]
+        self._create(course_id="c1", user_id="other")
+
+        rows = session_model.list_sessions_for_course("c1", user_id=" owner ")
+        self.assertEqual([row["session_id"] for row in rows], [mine])
+        self.assertEqual(len(session_model.list_sessions_for_course("c1")), 2)
+
+
+class SessionImageTests(SessionStoreTestCase):
+    def test_image_is_held_in_memory_only(self):
+        session_id = self._create(image_b64="aW1hZ2U=")["session_id"]
+        self.assertEqual(session_model.get_session_image(session_id), "aW1hZ2U=")
+        self.assertIsNone(session_model.get_session(session_id)["image_b64"])
+
+        session_model.flush_sessions()
+        self.assertIsNone(read_json(self.sessions_file)[session_id]["image_b64"])
+        self.assertNotIn("aW1hZ2U=", self.sessions_file.read_text(encoding="utf-8"))
+
+    def test_clearing_and_deleting_drop_the_image(self):
+        cleared = self._create(image_b64="aW1hZ2U=")["session_id"]
+        session_model.update_session(cleared, image_b64=None)
+        self.assertIsNone(session_model.get_session_image(cleared))
+
+        deleted = self._create(course_id="c1", image_b64="aW1hZ2U=")["session_id"]
+        session_model.delete_sessions_for_course("c1")
+        self.assertEqual(session_model._image_blobs, {})
+        self.assertIsNone(session_model.get_session_image(deleted))
+
+
+class SessionResponseCacheTests(SessionStoreTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(sessions_router, "_session_bytes_cache", OrderedDict())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _body(self, session_id):
+        return sessions_router._session_response_bytes(session_model.get_session(session_id))
+
+    def test_update_invalidates_cached_bytes(self):
+        session_id = self._create()["session_id"]
+        first = self._body(session_id)
+        self.assertEqual(orjson.loads(first)["status"], "processing")
+
+        session_model.update_session(session_id, status="complete")
+        self.assertEqual(orjson.loads(self._body(session_id))["status"], "complete")
+
+    def test_no_op_update_keeps_cached_bytes(self):
+        session_id = self._create()["session_id"]
+        first = self._body(session_id)
+
+        session_model.update_session(session_id, status="processing")
+        self.assertIs(self._body(session_id), first)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import json
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from app.models.storage import DebouncedWriter, read_json, write_json_atomic
+
+
+class WriteJsonAtomicTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "store.json"
+
+    def test_round_trips_unicode_payload(self):
+        payload = {"c1": {"label": "Calcul différentiel", "chunks": [{"text": "∫ f(x) dx"}]}}
+        write_json_atomic(self.path, payload)
+        self.assertEqual(json.loads(self.path.read_text(encoding="utf-8")), payload)
+        self.assertEqual(read_json(self.path), payload)
+        self.assertIn("différentiel", self.path.read_text(encoding="utf-8"))
+
+    def test_replaces_existing_file_without_leaving_temp(self):
+        self.path.write_text('{"old": true}', encoding="utf-8")
+        write_json_atomic(self.path, {"new": True})
+        self.assertEqual(json.loads(self.path.read_text(encoding="utf-8")), {"new": True})
+        self.assertEqual([p.name for p in self.path.parent.iterdir()], ["store.json"])
+
+    def test_unchanged_payload_skips_the_write(self):
+        digest = write_json_atomic(self.path, {"a": 1})
+        self.path.write_text('{"tampered": true}', encoding="utf-8")
+        self.assertEqual(write_json_atomic(self.path, {"a": 1}, digest), digest)
+        self.assertEqual(json.loads(self.path.read_text(encoding="utf-8")), {"tampered": True})
+
+        self.path.unlink()
+        write_json_atomic(self.path, {"a": 1}, digest)
+        self.assertEqual(read_json(self.path), {"a": 1})
+        self.assertNotEqual(write_json_atomic(self.path, {"a": 2}, digest), digest)
+        self.assertEqual(read_json(self.path), {"a": 2})
+
+
+class DebouncedWriterTests(unittest.TestCase):
+    def test_burst_of_saves_is_written_once(self):
+        writes = []
+        writer = DebouncedWriter(lambda: writes.append(1), delay=60)
+        for _ in range(5):
+            writer.schedule()
+        self.assertEqual(writes, [])
+        writer.flush()
+        writer.flush()
+        self.assertEqual(writes, [1])
+
+    def test_timer_flushes_pending_changes(self):
+        writes = []
+        writer = DebouncedWriter(lambda: writes.append(1), delay=0.01)
+        writer.schedule()
+        deadline = time.monotonic() + 2
+        while not writes and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(writes, [1])
+
+
+if __name__ == "__main__":
+    unittest.main()